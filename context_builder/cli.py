@@ -18,16 +18,21 @@ from __future__ import annotations
 import argparse
 import ast
 import fnmatch
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import json
+import os
+import re
 import sys
 from pathlib import Path
-from typing import List, Dict, Tuple, Set
+from typing import Any, Iterable, Iterator, List, Dict, Optional, TextIO, Tuple, Set
 
 try:
     import tomllib  # Python ≥3.11
 except ModuleNotFoundError:  # Python 3.8–3.10
     import tomli as tomllib  # type: ignore
 
+from .parser_utils import read_source
 from .typescript_parser import ts_parser
 
 
@@ -50,73 +55,135 @@ SKIP_ALWAYS: Set[str] = {
 B_MID, B_LAST, P_PIPE, P_BLANK = "├── ", "└── ", "│   ", "    "
 
 
-def load_gitignore(root: Path) -> List[str]:
+def load_gitignore(root: Path) -> Optional[re.Pattern[str]]:
+    """
+    Compile the project's .gitignore patterns into one regex matching the
+    ignored relative paths and everything below them, or return None.
+    """
     gi = root / ".gitignore"
     if not gi.exists():
-        return []
+        return None
     patterns: List[str] = []
     for raw in gi.read_text(encoding="utf-8").splitlines():
         line = raw.strip()
         if not line or line.startswith("#") or line.startswith("!"):
             continue
-        patterns.append(line.rstrip("/"))
-    return patterns
+        line = line.rstrip("/")
+        patterns += [fnmatch.translate(line), fnmatch.translate(line + "/**")]
+    # an empty alternation would match every path
+    return re.compile("|".join(patterns)) if patterns else None
 
 
-def should_ignore(p: Path, root: Path, git_patterns: List[str]) -> bool:
-    if set(p.parts) & SKIP_ALWAYS:
-        return True
-    rel = str(p.relative_to(root))
-    return any(
-        fnmatch.fnmatch(rel, pat) or fnmatch.fnmatch(rel, pat + "/**")
-        for pat in git_patterns
-    )
+def is_gitignored(rel: str, ignore_re: Optional[re.Pattern[str]]) -> bool:
+    return ignore_re is not None and ignore_re.match(rel) is not None
 
 
 # ─────────────────────────── tree view ────────────────────────────
-def ascii_tree(root: Path, git_patterns: List[str]) -> str:
+def ascii_tree(root: Path, ignore_re: Optional[re.Pattern[str]]) -> str:
     lines: List[str] = [root.name]
-
-    def _walk(dir_path: Path, prefix: str = "") -> None:
-        kids = sorted(
-            [k for k in dir_path.iterdir() if not should_ignore(k, root, git_patterns)]
-        )
-        for i, child in enumerate(kids):
+    if set(root.parts) & SKIP_ALWAYS:
+        return root.name
+
+    def _walk(dir_path: str, rel_prefix: str = "", prefix: str = "") -> None:
+        with os.scandir(dir_path) as entries:
+            kids = sorted(
+                (
+                    e
+                    for e in entries
+                    if e.name not in SKIP_ALWAYS
+                    and not is_gitignored(rel_prefix + e.name, ignore_re)
+                ),
+                key=lambda e: e.name,
+            )
+        for i, entry in enumerate(kids):
             conn = B_LAST if i == len(kids) - 1 else B_MID
-            lines.append(f"{prefix}{conn}{child.name}")
-            if child.is_dir():
+            lines.append(f"{prefix}{conn}{entry.name}")
+            if entry.is_dir():
                 ext = P_BLANK if i == len(kids) - 1 else P_PIPE
-                _walk(child, prefix + ext)
+                _walk(entry.path, rel_prefix + entry.name + os.sep, prefix + ext)
 
-    _walk(root)
+    _walk(str(root))
     return "\n".join(lines)
 
 
 # ────────────────────── file discovery ─────────────────────
-def list_py_files(root: Path, git_patterns: List[str]) -> List[Path]:
-    return sorted(
-        p for p in root.rglob("*.py") if not should_ignore(p, root, git_patterns)
-    )
+def _iter_files(
+    dir_path: str,
+    rel_prefix: str,
+    suffixes: Tuple[str, ...],
+    ignore_re: Optional[re.Pattern[str]],
+) -> Iterator[str]:
+    """
+    Yield the paths of files ending in *suffixes* below *dir_path*, without
+    following symlinks and without descending into ignored directories.
+    """
+    try:
+        entries = os.scandir(dir_path)
+    except OSError:  # unreadable directory
+        return
+    with entries:
+        for entry in entries:
+            if entry.name in SKIP_ALWAYS:
+                continue
+            rel = rel_prefix + entry.name
+            if is_gitignored(rel, ignore_re):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path, rel + os.sep, suffixes, ignore_re)
+            elif entry.name.endswith(suffixes):
+                yield entry.path
+
+
+def list_files(
+    root: Path, suffixes: Tuple[str, ...], ignore_re: Optional[re.Pattern[str]]
+) -> List[Path]:
+    if set(root.parts) & SKIP_ALWAYS:
+        return []
+    return sorted(Path(p) for p in _iter_files(str(root), "", suffixes, ignore_re))
+
 
+def list_py_files(root: Path, ignore_re: Optional[re.Pattern[str]]) -> List[Path]:
+    return list_files(root, (".py",), ignore_re)
 
-def list_ts_js_files(root: Path, git_patterns: List[str]) -> List[Path]:
+
+def list_ts_js_files(root: Path, ignore_re: Optional[re.Pattern[str]]) -> List[Path]:
     """Find JavaScript and TypeScript files in the project."""
-    js_ts_files = []
-    for pattern in ["*.js", "*.jsx", "*.ts", "*.tsx"]:
-        js_ts_files.extend(
-            p for p in root.rglob(pattern) if not should_ignore(p, root, git_patterns)
-        )
-    return sorted(js_ts_files)
+    return list_files(root, (".js", ".jsx", ".ts", ".tsx"), ignore_re)
 
 
 # ─────────────────── class / func extraction helpers ──────────────
+# Fields through which statements nest, in ``ast.iter_child_nodes`` order
+_BODY_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+
+
+def _walk_statements(node: ast.AST) -> Iterator[ast.AST]:
+    """
+    Like ``ast.walk``, but only descend through statement bodies (and the
+    except handlers and match cases holding them), never into expressions.
+    Statements come out in the same breadth-first order.
+    """
+    todo = deque([node])
+    while todo:
+        node = todo.popleft()
+        for field in _BODY_FIELDS:
+            todo.extend(getattr(node, field, ()))
+        yield node
+
+
+def _unparse(node: ast.AST) -> str:
+    """``ast.unparse``, without running the unparser for a bare name."""
+    if isinstance(node, ast.Name):
+        return node.id
+    return ast.unparse(node)
+
+
 def _type_of_assign(node: ast.AST) -> str:
     """
     Return a string representation of the type annotation on an assignment node,
     or "Unknown" if none.
     """
     if isinstance(node, ast.AnnAssign) and node.annotation:
-        return ast.unparse(node.annotation)
+        return _unparse(node.annotation)
     if isinstance(node, ast.Assign) and getattr(node, "type_comment", None):
         return node.type_comment or "Unknown"
     return "Unknown"
@@ -134,23 +201,29 @@ def _collect_class_attrs(cls: ast.ClassDef) -> List[Tuple[str, str]]:
 
 
 def _collect_instance_attrs(cls: ast.ClassDef) -> List[Tuple[str, str]]:
+    # every definition counts, e.g. @overload stubs before the real __init__
+    inits = [
+        stmt
+        for stmt in cls.body
+        if isinstance(stmt, ast.FunctionDef) and stmt.name == "__init__"
+    ]
+    if not inits:  # dataclasses, enums, plain namespaces
+        return []
+
     pairs: List[Tuple[str, str]] = []
-    for stmt in cls.body:
-        if isinstance(stmt, ast.FunctionDef) and stmt.name == "__init__":
-            for node in ast.walk(stmt):
-                if isinstance(node, (ast.Assign, ast.AnnAssign)):
-                    targets = (
-                        [node.target]
-                        if isinstance(node, ast.AnnAssign)
-                        else node.targets
-                    )
-                    for tgt in targets:
-                        if (
-                            isinstance(tgt, ast.Attribute)
-                            and isinstance(tgt.value, ast.Name)
-                            and tgt.value.id == "self"
-                        ):
-                            pairs.append((tgt.attr, _type_of_assign(node)))
+    for init in inits:
+        for node in _walk_statements(init):
+            if isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = (
+                    [node.target] if isinstance(node, ast.AnnAssign) else node.targets
+                )
+                for tgt in targets:
+                    if (
+                        isinstance(tgt, ast.Attribute)
+                        and isinstance(tgt.value, ast.Name)
+                        and tgt.value.id == "self"
+                    ):
+                        pairs.append((tgt.attr, _type_of_assign(node)))
     return pairs
 
 
@@ -162,19 +235,22 @@ def _collect_properties(cls: ast.ClassDef) -> List[Tuple[str, str]]:
                 if (isinstance(dec, ast.Name) and dec.id == "property") or (
                     isinstance(dec, ast.Attribute) and dec.attr == "property"
                 ):
-                    ret = ast.unparse(stmt.returns) if stmt.returns else "Unknown"
+                    ret = _unparse(stmt.returns) if stmt.returns else "Unknown"
                     props.append((stmt.name, ret))
     return props
 
 
-def extract_from_file(file: Path, project_root: Path) -> Tuple[List[str], List[str]]:
+def extract_from_file(
+    file: Path, project_root: Path, content: Optional[str] = None
+) -> Tuple[List[str], List[str]]:
     """
-    Return two lists: [function-lines], [class-lines] extracted from *file*.
+    Return two lists: [function-lines], [class-lines] extracted from *file*,
+    whose text is read unless given as *content*.
     """
+    if content is None:
+        content = read_source(file)
     try:
-        tree = ast.parse(
-            file.read_text(encoding="utf-8", errors="ignore"), filename=str(file)
-        )
+        tree = ast.parse(content, filename=str(file))
     except SyntaxError:
         return [], []
 
@@ -182,18 +258,18 @@ def extract_from_file(file: Path, project_root: Path) -> Tuple[List[str], List[s
     cls_lines: List[str] = []
     rel = file.relative_to(project_root)
 
-    for node in ast.walk(tree):
+    for node in _walk_statements(tree):
         # functions / async functions
         if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
             args: List[str] = []
             for a in node.args.args:
-                ann = ast.unparse(a.annotation) if a.annotation else None
+                ann = _unparse(a.annotation) if a.annotation else None
                 args.append(f"{a.arg}: {ann}" if ann else a.arg)
             if node.args.vararg:
                 args.append(f"*{node.args.vararg.arg}")
             if node.args.kwarg:
                 args.append(f"**{node.args.kwarg.arg}")
-            ret = ast.unparse(node.returns) if node.returns else "Unknown"
+            ret = _unparse(node.returns) if node.returns else "Unknown"
             func_lines.append(
                 f"{rel}:{node.lineno}: {node.name}({', '.join(args)}) -> {ret}"
             )
@@ -201,7 +277,7 @@ def extract_from_file(file: Path, project_root: Path) -> Tuple[List[str], List[s
         # classes
         elif isinstance(node, ast.ClassDef):
             header = f"{rel}:{node.lineno}: class {node.name}"
-            bases = ", ".join(ast.unparse(b) for b in node.bases) if node.bases else ""
+            bases = ", ".join(_unparse(b) for b in node.bases) if node.bases else ""
             if bases:
                 header += f"({bases})"
             cls_lines.append(header)
@@ -271,14 +347,164 @@ def gather_dependencies(root: Path) -> List[str]:
     return sorted(set(deps))
 
 
+# ───────────────────────── parallel parsing ──────────────────────
+# Below this many files, starting worker processes costs more than it saves.
+PARALLEL_MIN_FILES = 8
+
+
+def _parse_file(job: Tuple[Path, Path]) -> Tuple[List[str], List[str]]:
+    """Extract the lines of one (file, project-root) job; top-level so it pickles."""
+    f, project_root = job
+    if f.suffix == ".py":
+        return extract_from_file(f, project_root)
+    return ts_parser.parse_file(f)
+
+
+def parse_files(files: List[Path], project_root: Path) -> List[Tuple[List[str], List[str]]]:
+    """
+    Return [function-lines], [class-lines] for every file, in order, spreading
+    the work over one process per core.
+    """
+    jobs = [(f, project_root) for f in files]
+    if len(jobs) >= PARALLEL_MIN_FILES:
+        try:
+            ex = ProcessPoolExecutor()
+        except (OSError, NotImplementedError):  # no process support here
+            pass
+        else:
+            with ex:  # errors raised while parsing propagate as they are
+                return list(ex.map(_parse_file, jobs, chunksize=16))
+    return [_parse_file(job) for job in jobs]
+
+
+# ─────────────────────────── parse cache ─────────────────────────
+# Bump whenever the extracted lines change for unchanged input.
+PARSE_CACHE_VERSION = 1
+
+CacheEntries = Dict[str, list]
+
+
+def _parse_cache_file() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "context_builder" / "parse_cache.json"
+
+
+def _parse_cache_stamp() -> str:
+    # tree-sitter output differs from the regex fallback, and ast output from
+    # one Python version to the next, so each combination gets its own stamp
+    tree_sitter = ts_parser._ts_tree_parser is not None
+    python = ".".join(map(str, sys.version_info[:2]))
+    return f"{PARSE_CACHE_VERSION}:{int(tree_sitter)}:{python}"
+
+
+def load_parse_cache() -> Dict[str, Any]:
+    """
+    Return the cache file's contents, ``{"stamp": ..., "roots": {root: entries}}``,
+    or an empty cache when it is missing, stale or not shaped like one.
+    """
+    stamp = _parse_cache_stamp()
+    try:
+        data = json.loads(_parse_cache_file().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = None
+    if (
+        not isinstance(data, dict)
+        or data.get("stamp") != stamp
+        or not isinstance(data.get("roots"), dict)
+    ):
+        return {"stamp": stamp, "roots": {}}
+    data["roots"] = {k: v for k, v in data["roots"].items() if isinstance(v, dict)}
+    return data
+
+
+def root_entries(cache: Dict[str, Any], root: Path) -> CacheEntries:
+    """
+    Return the cached entries for *root*: relative path →
+    [mtime_ns, size, function-lines, class-lines].
+    """
+    return cache["roots"].get(str(root), {})
+
+
+def save_parse_cache(cache: Dict[str, Any], root: Path, entries: CacheEntries) -> None:
+    """Store *entries* for *root* in *cache*, replacing what it held before, and write it."""
+    cache["roots"][str(root)] = entries
+    cache_file = _parse_cache_file()
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache), encoding="utf-8")
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # the cache is only an optimisation
+
+
+def _valid_entry(entry: Any) -> bool:
+    """Whether *entry* is shaped [mtime_ns, size, function-lines, class-lines]."""
+    return (
+        isinstance(entry, list)
+        and len(entry) == 4
+        and all(type(n) is int for n in entry[:2])
+        and all(
+            isinstance(lines, list) and all(isinstance(line, str) for line in lines)
+            for lines in entry[2:]
+        )
+    )
+
+
+def parse_files_cached(
+    files: List[Path], root: Path, cache: CacheEntries, fresh: CacheEntries
+) -> List[Tuple[List[str], List[str]]]:
+    """
+    Parse every file whose mtime or size differs from its *cache* entry,
+    reuse the cached lines otherwise, and record all results in *fresh*.
+    """
+    results: Dict[Path, Tuple[List[str], List[str]]] = {}
+    stamps: Dict[Path, List[int]] = {}
+    for f in files:
+        try:
+            st = f.stat()
+        except OSError:  # e.g. a dangling symlink; leave it to the parser
+            continue
+        stamps[f] = [st.st_mtime_ns, st.st_size]
+        entry = cache.get(str(f.relative_to(root)))
+        if _valid_entry(entry) and entry[:2] == stamps[f]:
+            results[f] = (entry[2], entry[3])
+
+    misses = [f for f in files if f not in results]
+    results.update(zip(misses, parse_files(misses, root)))
+
+    for f, stamp in stamps.items():
+        fresh[str(f.relative_to(root))] = stamp + list(results[f])
+    return [results[f] for f in files]
+
+
 # ───────────────────────── source combiner ───────────────────────
-def combined_source(files: List[Path], project_root: Path) -> str:
-    blocks: List[str] = []
+def combined_source(files: List[Path], project_root: Path) -> Iterator[str]:
+    """Yield every file's text under a header line, one file at a time."""
+    sep = ""
     for f in files:
-        blocks.append(f"# === {f.relative_to(project_root)} ===")
-        blocks.append(f.read_text(encoding="utf-8", errors="ignore"))
-        blocks.append("")
-    return "\n".join(blocks)
+        yield f"{sep}# === {f.relative_to(project_root)} ===\n"
+        yield read_source(f)
+        yield "\n"
+        sep = "\n"
+
+
+def write_section(
+    out: TextIO, title: str, groups: Iterable[List[str]], placeholder: str
+) -> None:
+    """
+    Write *title* and then every line of *groups* to *out*, each on a new line,
+    or *placeholder* when there are no lines at all.
+    """
+    out.write(f"\n{title}")
+    empty = True
+    for lines in groups:
+        if lines:
+            out.write("\n")
+            out.write("\n".join(lines))
+            empty = False
+    if empty:
+        out.write(f"\n{placeholder}")
 
 
 # ───────────────────────────── main ─────────────────────────────
@@ -291,57 +517,63 @@ def main() -> None:
     ap.add_argument(
         "--include-source", action="store_true", help="Append full source code"
     )
+    ap.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-parse every file and leave the parse cache untouched",
+    )
     args = ap.parse_args()
 
     root = args.root.resolve()
     if not root.is_dir():
         sys.exit(f"[ERR] {root} is not a directory")
 
-    git_patterns = load_gitignore(root)
-    py_files = list_py_files(root, git_patterns)
-    js_ts_files = list_ts_js_files(root, git_patterns)
+    ignore_re = load_gitignore(root)
+    py_files = list_py_files(root, ignore_re)
+    js_ts_files = list_ts_js_files(root, ignore_re)
 
     if not py_files and not js_ts_files:
         sys.exit("[ERR] No Python or JavaScript/TypeScript files found (after filtering).")
 
     # 1. Project structure
-    report: List[str] = [
-        "# ───────────── Project Structure ─────────────",
-        ascii_tree(root, git_patterns),
-    ]
+    tree = ascii_tree(root, ignore_re)
 
     # 2 & 3. Functions and classes
-    all_funcs: List[str] = []
-    all_classes: List[str] = []
-    
-    # Process Python files
-    for f in py_files:
-        funcs, classes = extract_from_file(f, root)
-        all_funcs.extend(funcs)
-        all_classes.extend(classes)
+    cache = None if args.no_cache else load_parse_cache()
+    fresh: CacheEntries = {}
     
-    # Process JavaScript and TypeScript files
-    for f in js_ts_files:
-        funcs, classes = ts_parser.parse_file(f)
-        all_funcs.extend(funcs)
-        all_classes.extend(classes)
+    # Process Python files, then JavaScript and TypeScript files
+    entries = root_entries(cache, root) if cache is not None else {}
+    results = parse_files_cached(py_files + js_ts_files, root, entries, fresh)
 
-    report.append("# ───────────── Function Signatures ─────────────")
-    report.extend(all_funcs if all_funcs else ["<no functions found>"])
-
-    report.append("# ───────────── Class Definitions ─────────────")
-    report.extend(all_classes if all_classes else ["<no classes found>"])
+    if cache is not None:
+        save_parse_cache(cache, root, fresh)
 
     # 4. Dependencies
-    report.append("# ───────────── Dependencies ─────────────")
     deps = gather_dependencies(root)
-    report.extend(deps if deps else ["<none detected>"])
 
-    # 5. Combined source (optional)
-    if args.include_source:
-        report.append("# ───────────── Combined Source ─────────────")
-        all_files = py_files + js_ts_files
-        report.append(combined_source(all_files, root))
+    with args.out.open("w", encoding="utf-8") as out:
+        out.write("# ───────────── Project Structure ─────────────\n")
+        out.write(tree)
+        write_section(
+            out,
+            "# ───────────── Function Signatures ─────────────",
+            (funcs for funcs, _ in results),
+            "<no functions found>",
+        )
+        write_section(
+            out,
+            "# ───────────── Class Definitions ─────────────",
+            (classes for _, classes in results),
+            "<no classes found>",
+        )
+        write_section(
+            out, "# ───────────── Dependencies ─────────────", [deps], "<none detected>"
+        )
+
+        # 5. Combined source (optional), streamed so only one file is in memory
+        if args.include_source:
+            out.write("\n# ───────────── Combined Source ─────────────\n")
+            out.writelines(combined_source(py_files + js_ts_files, root))
 
-    args.out.write_text("\n".join(report), encoding="utf-8")
     print(f"[OK] Report written → {args.out}")
@@ -2,137 +2,287 @@
 """JavaScript parser for context builder.
 
 This parser uses regex-based heuristics to extract function signatures,
-class definitions, and default exports from JavaScript and JSX files.
+class definitions, and default exports from JavaScript and JSX files. When
+the optional ``tree_sitter_languages`` package is installed, a real syntax
+tree is walked instead.
 """
 
 from __future__ import annotations
 
 import re
+from bisect import bisect_left
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+try:  # optional multi-pattern scanner
+    import hyperscan
+except ImportError:  # plain ``re`` is used when it is unavailable
+    hyperscan = None  # type: ignore
+
+from .parser_utils import (
+    CODE_LINE,
+    load_tree_sitter,
+    node_name,
+    node_text,
+    read_source,
+    single_line,
+    stripped_match,
+)
+
+_NOT_MID_WORD = r"(?<!\w)"
+
+# Function patterns, in priority order, as (name, literal the line must contain, regex)
+_FUNCTION_PATTERNS = (
+    # export default function foo(params)
+    ("default_function", "export", r"export\s+default\s+function\s*(\w+)?\s*\(([^)]*)\)"),
+    # export function foo(params)
+    ("export_function", "export", r"export\s+(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)"),
+    # regular function
+    ("function", "function", r"(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)"),
+    # const foo = (params) =>
+    ("arrow", "=>", r"(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?\(([^)]*)\)\s*=>"),
+    # export default (params) =>
+    ("default_arrow", "=>", r"export\s+default\s*(?:async\s+)?\(([^)]*)\)\s*=>"),
+    # method definitions in classes/objects; starting mid-word never finds more
+    ("method", "{", _NOT_MID_WORD + r"(\w+)\s*\(([^)]*)\)\s*\{"),
+)
+
+# Patterns only tried where a line starts, so most lines fail them at once
+_LINE_START_PATTERNS = frozenset({"default_function", "default_arrow"})
+
+# default export of identifier
+_DEFAULT_EXPORT_PATTERNS = (
+    ("default_export", None, r"export\s+default\s+(\w+)\s*;"),
+)
+
+# Class patterns, in priority order
+_CLASS_PATTERNS = (
+    ("default_class", None, r"export\s+default\s+class\s+(\w+)?"),
+    ("export_class", None, r"export\s+class\s+(\w+)"),
+    ("class", None, r"class\s+(\w+)"),
+)
+_CLASS_KINDS = frozenset(name for name, _, _ in _CLASS_PATTERNS)
+
+
+def _alternatives(patterns: Tuple[Tuple[str, Optional[str], str], ...]) -> str:
+    # A lazy prefix in front of each named group makes the alternation try the
+    # patterns one after the other on the whole line, like searching each in turn.
+    # The lookahead skips that scan when the line lacks the pattern's literal.
+    # Line-start patterns only get past the indentation instead.
+    return "|".join(
+        (
+            r"[^\S\n]*"
+            if name in _LINE_START_PATTERNS
+            else (f"(?=[^\\n]*{re.escape(literal)})" if literal else "") + r"[^\n]*?"
+        )
+        + f"(?P<{name}>{single_line(p)})"
+        for name, literal, p in patterns
+    )
+
+
+# A single multi-line regex that tries the function patterns, then the default
+# export, then the class patterns at the start of every code line. Each lookahead
+# cheaply skips a family when the line lacks the literal all its patterns need.
+# The outer group that matched is ``lastgroup``; its captures follow ``lastindex``.
+_LINE_RE = re.compile(
+    rf"^{CODE_LINE}(?:(?=[^\n]*\()(?:{_alternatives(_FUNCTION_PATTERNS)})"
+    rf"|(?=[^\n]*export)(?:{_alternatives(_DEFAULT_EXPORT_PATTERNS)})"
+    rf"|(?=[^\n]*class)(?:{_alternatives(_CLASS_PATTERNS)}))",
+    re.MULTILINE,
+)
+# ``lastindex`` of each function pattern's outer group → its capture count
+_FUNCTION_GROUPS: Dict[int, int] = {
+    _LINE_RE.groupindex[name]: re.compile(p).groups for name, _, p in _FUNCTION_PATTERNS
+}
+
+
+def _build_hyperscan_db() -> Optional[hyperscan.Database]:
+    """Compile every pattern into one Hyperscan database, or return ``None``."""
+    if hyperscan is None:
+        return None
+    patterns = _FUNCTION_PATTERNS + _DEFAULT_EXPORT_PATTERNS + _CLASS_PATTERNS
+    # Hyperscan has no lookbehind; dropping it only adds candidate lines
+    expressions = [p.replace(_NOT_MID_WORD, "").encode() for _, _, p in patterns]
+    db = hyperscan.Database()
+    try:
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            elements=len(expressions),
+            flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP] * len(expressions),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+# tree-sitter node types
+_TS_FUNCTION_NODES = frozenset(
+    {"function_declaration", "generator_function_declaration", "method_definition"}
+)
+_TS_FUNCTION_VALUES = frozenset(
+    {"arrow_function", "function", "function_expression", "generator_function"}
+)
+_TS_CLASS_NODES = frozenset({"class_declaration", "class"})
+
+
+def _node_params(node: Any) -> str:
+    """Parameter names of a function node, without default values."""
+    params = node.child_by_field_name("parameters")
+    if params is None:  # single unparenthesised arrow parameter
+        param = node.child_by_field_name("parameter")
+        return node_text(param) if param is not None else ""
+    names: List[str] = []
+    for param in params.named_children:
+        if param.type == "comment":
+            continue
+        if param.type == "assignment_pattern":
+            param = param.child_by_field_name("left")
+        names.append(node_text(param))
+    return ", ".join(names)
 
 
 class JavaScriptParser:
-    """Parser for JavaScript/JSX files using regex-based parsing."""
+    """Parser for JavaScript/JSX files using regex-based parsing.
+
+    When the optional ``hyperscan`` package is installed, the whole file is
+    scanned once against all patterns and only the lines that produced a hit
+    are matched with ``re`` for group extraction.
+    """
+
+    def __init__(self) -> None:
+        self._hs_db = _build_hyperscan_db()
+        self._tree_parser = load_tree_sitter("javascript")
 
-    def parse_file(self, file_path: Path) -> Tuple[List[str], List[str]]:
-        """Parse a JavaScript file and return function and class definitions."""
+    def parse_file(self, file_path: Path, content: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """Parse a JavaScript file and return function and class definitions.
+
+        The file is read unless its text is passed as ``content``.
+        """
         try:
-            content = file_path.read_text(encoding="utf-8", errors="ignore")
+            if content is None:
+                content = read_source(file_path)
+            if self._tree_parser is not None:
+                return self._parse_with_tree_sitter(content, file_path)
             return self._parse_with_regex(content, file_path)
         except Exception:
             return [], []
 
-    def _parse_with_regex(self, content: str, file_path: Path) -> Tuple[List[str], List[str]]:
+    def _parse_with_tree_sitter(self, content: str, file_path: Path) -> Tuple[List[str], List[str]]:
         func_lines: List[str] = []
         cls_lines: List[str] = []
         rel_path = file_path.name
 
-        # Function patterns
-        function_patterns = [
-            # export default function foo(params)
-            r"export\s+default\s+function\s*(\w+)?\s*\(([^)]*)\)",
-            # export function foo(params)
-            r"export\s+(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)",
-            # regular function
-            r"(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)",
-            # const foo = (params) =>
-            r"(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?\(([^)]*)\)\s*=>",
-            # export default (params) =>
-            r"export\s+default\s*(?:async\s+)?\(([^)]*)\)\s*=>",
-            # method definitions in classes/objects
-            r"(\w+)\s*\(([^)]*)\)\s*{",
-        ]
-
-        # Class patterns
-        class_patterns = [
-            r"export\s+default\s+class\s+(\w+)?",
-            r"export\s+class\s+(\w+)",
-            r"class\s+(\w+)",
-        ]
-
-        # default export of identifier
-        default_export_pattern = r"export\s+default\s+(\w+)\s*;"
-
-        lines = content.split("\n")
-        for i, raw in enumerate(lines, 1):
-            line = raw.strip()
-            if not line:
-                continue
+        tree = self._tree_parser.parse(content.encode("utf-8", errors="ignore"))
+        stack = [tree.root_node]
+        while stack:  # pre-order walk, so definitions come out in source order
+            node = stack.pop()
+            stack.extend(reversed(node.named_children))
+            kind = node.type
+            i = node.start_point[0] + 1
 
-            # Check for functions
-            matched = False
-            for idx, pattern in enumerate(function_patterns):
-                match = re.search(pattern, line)
-                if match:
-                    matched = True
-                    if idx == 4:  # anonymous default exported arrow func
-                        params = match.group(1).strip()
-                        func_name = "<anonymous>"
-                    else:
-                        func_name = match.group(1)
-                        params = match.group(2) if len(match.groups()) > 1 else ""
-                        func_name = func_name if func_name else "<anonymous>"
-                        params = params.strip()
-
-                    params = self._clean_js_params(params)
-                    func_lines.append(f"{rel_path}:{i}: {func_name}({params})")
-                    break
-
-            if matched:
-                continue
+            if kind in _TS_FUNCTION_NODES:
+                func_lines.append(f"{rel_path}:{i}: {node_name(node)}({_node_params(node)})")
+            elif kind == "variable_declarator":  # const foo = (params) => ...
+                value = node.child_by_field_name("value")
+                if value is not None and value.type in _TS_FUNCTION_VALUES:
+                    func_lines.append(f"{rel_path}:{i}: {node_name(node)}({_node_params(value)})")
+            elif kind == "export_statement" and any(c.type == "default" for c in node.children):
+                value = node.child_by_field_name("value")
+                if value is None:  # a named declaration, reported on its own
+                    continue
+                if value.type in _TS_FUNCTION_VALUES:
+                    func_lines.append(f"{rel_path}:{i}: {node_name(value)}({_node_params(value)})")
+                elif value.type == "identifier":
+                    func_lines.append(f"{rel_path}:{i}: export default {node_text(value)}")
+            elif kind in _TS_CLASS_NODES:
+                cls_lines.append(f"{rel_path}:{i}: class {node_name(node)}")
 
-            # Check for default export of identifier
-            match = re.search(default_export_pattern, line)
-            if match:
-                func_lines.append(f"{rel_path}:{i}: export default {match.group(1)}")
+        return func_lines, cls_lines
+
+    def _parse_with_regex(self, content: str, file_path: Path) -> Tuple[List[str], List[str]]:
+        func_lines: List[str] = []
+        cls_lines: List[str] = []
+        rel_path = file_path.name
+
+        i, pos = 1, 0
+        for match in self._iter_matches(content):
+            i += content.count("\n", pos, match.start())
+            pos = match.start()
+            match = stripped_match(_LINE_RE, content, match)
+            if match is None:
                 continue
+            kind = match.lastgroup
+            base = match.lastindex
+
+            if kind in _CLASS_KINDS:
+                class_name = match.group(base + 1) or "<anonymous>"
+                cls_lines.append(f"{rel_path}:{i}: class {class_name}")
+            elif kind == "default_export":
+                func_lines.append(f"{rel_path}:{i}: export default {match.group(base + 1)}")
+            else:
+                if _FUNCTION_GROUPS[base] > 1:
+                    func_name = match.group(base + 1) or "<anonymous>"
+                    params = match.group(base + 2)
+                else:  # anonymous default exported arrow func
+                    func_name = "<anonymous>"
+                    params = match.group(base + 1)
 
-            # Check for classes
-            for pattern in class_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    class_name = match.group(1) if match.group(1) else "<anonymous>"
-                    cls_lines.append(f"{rel_path}:{i}: class {class_name}")
-                    break
+                params = self._clean_js_params(params.strip())
+                func_lines.append(f"{rel_path}:{i}: {func_name}({params})")
 
         return func_lines, cls_lines
 
+    def _iter_matches(self, content: str) -> Iterator[re.Match[str]]:
+        """Yield the first definition match of every line, in line order."""
+        if self._hs_db is None:
+            return _LINE_RE.finditer(content)
+        return self._iter_hyperscan_matches(content)
+
+    def _iter_hyperscan_matches(self, content: str) -> Iterator[re.Match[str]]:
+        """Only run :data:`_LINE_RE` on the lines Hyperscan found a hit on.
+
+        Hyperscan reports every offset at which a match ends, so each match that
+        fits on a single line marks that line. Matches spanning lines only add
+        extra candidates, which ``re`` then rejects.
+        """
+        data = content.encode("utf-8", "ignore")
+        byte_newlines = [m.start() for m in re.finditer(b"\n", data)]
+        hits: Set[int] = set()
+
+        def on_match(_id: int, _start: int, end: int, _flags: int, _context: object) -> None:
+            hits.add(bisect_left(byte_newlines, end - 1))
+
+        self._hs_db.scan(data, match_event_handler=on_match)
+
+        newlines = [m.start() for m in re.finditer("\n", content)]
+        for idx in sorted(hits):
+            match = _LINE_RE.match(content, newlines[idx - 1] + 1 if idx else 0)
+            if match:
+                yield match
+
     def _clean_js_params(self, params: str) -> str:
         """Clean parameter string by removing default values and excess whitespace."""
         if not params:
             return ""
 
-        param_list: List[str] = []
-        current = ""
-        paren_count = 0
-        for char in params:
-            if char == "(":
-                paren_count += 1
-            elif char == ")":
-                paren_count -= 1
-            elif char == "," and paren_count == 0:
-                param_list.append(current.strip())
-                current = ""
-                continue
-            current += char
-
-        if current.strip():
-            param_list.append(current.strip())
-
-        cleaned: List[str] = []
-        for param in param_list:
-            if "=" in param:
-                param = param.split("=", 1)[0].strip()
-            cleaned.append(param.strip())
+        # ``params`` comes from a ``[^)]*`` capture, so a nested "(" is never
+        # closed: only the commas before the first "(" separate parameters.
+        head, paren, tail = params.partition("(")
+        param_list = head.split(",")
+        param_list[-1] += paren + tail
+        param_list = [param.strip() for param in param_list]
+        if not param_list[-1]:
+            param_list.pop()
 
-        return ", ".join(cleaned)
+        # drop default values
+        return ", ".join(param.partition("=")[0].strip() for param in param_list)
 
 
 # Global parser instance
 js_parser = JavaScriptParser()
 
 
-def parse_file(file_path: Path) -> Tuple[List[str], List[str]]:
+def parse_file(file_path: Path, content: Optional[str] = None) -> Tuple[List[str], List[str]]:
     """Convenience wrapper that uses the global :class:`JavaScriptParser`."""
-    return js_parser.parse_file(file_path)
+    return js_parser.parse_file(file_path, content)
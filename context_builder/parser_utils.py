@@ -0,0 +1,61 @@
+"""Helpers shared by the JavaScript and TypeScript parsers."""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Optional
+
+try:  # optional syntax-tree parser
+    from tree_sitter_languages import get_parser
+except ImportError:  # the regex heuristics are used when it is unavailable
+    get_parser = None  # type: ignore
+
+# Blank lines and lines opening with a comment, "}" or ";" hold no definitions
+CODE_LINE = r"(?=[^\S\n]*[^\s/}*;])"
+
+
+def read_source(file: Path) -> str:
+    """Read *file* as UTF-8, dropping undecodable bytes and normalising line
+    endings to "\\n" as ``Path.read_text`` does, with a single decode.
+    """
+    text = file.read_bytes().decode("utf-8", errors="ignore")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def single_line(pattern: str) -> str:
+    """Stop *pattern* from matching across a newline."""
+    return pattern.replace("[^", r"[^\n").replace(r"\s", r"[^\S\n]")
+
+
+def stripped_match(regex: re.Pattern[str], content: str, match: re.Match[str]) -> Optional[re.Match[str]]:
+    """Redo *match* without the line's trailing blanks if it ran into them.
+
+    The patterns were written against stripped lines, where an ending ``\\s+``
+    or ``[^{]+`` could not pick up whitespace at the end of the line.
+    """
+    if not content[match.end() - 1].isspace():
+        return match
+    end = content.find("\n", match.start())
+    return regex.match(content[match.start() : end if end != -1 else len(content)].rstrip())
+
+
+def load_tree_sitter(language: str) -> Optional[Any]:
+    """Return a tree-sitter parser for *language*, or ``None`` if unavailable."""
+    if get_parser is None:
+        return None
+    try:
+        return get_parser(language)
+    except Exception:  # e.g. a tree_sitter release the bundled grammars do not support
+        return None
+
+
+def node_text(node: Any) -> str:
+    return node.text.decode("utf-8", errors="ignore")
+
+
+def node_name(node: Any) -> str:
+    name = node.child_by_field_name("name")
+    return node_text(name) if name is not None else "<anonymous>"
@@ -2,6 +2,7 @@
 """
 TypeScript parser for context builder
 Uses regex-based parsing to extract function signatures, class definitions, and types from TypeScript files.
+When the optional ``tree_sitter_languages`` package is installed, a real syntax tree is walked instead.
 """
 
 from __future__ import annotations
@@ -10,80 +11,229 @@ import re
 from pathlib import Path
 from typing import List, Tuple, Optional, Dict, Any
 
+from .parser_utils import (
+    CODE_LINE,
+    load_tree_sitter,
+    node_name,
+    node_text,
+    read_source,
+    single_line,
+    stripped_match,
+)
+
+# Function patterns, in priority order, as (name, literals the line must contain, regex)
+_FUNCTION_PATTERNS = (
+    # Regular functions
+    ('function', 'function', r'(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)(?:\s*:\s*([^{]+))?'),
+    # Arrow functions assigned to variables
+    ('arrow', 'const|let|var', r'(?:export\s+)?(?:const|let|var)\s+(\w+)\s*[:=]\s*(?:async\s+)?\(([^)]*)\)(?:\s*=>\s*[^{]+)?'),
+    # Method definitions in classes/interfaces; starting mid-word never finds more
+    ('method', None, r'(?<!\w)(\w+)\s*\(([^)]*)\)(?:\s*:\s*([^{]+))?'),
+)
+
+# Class patterns, in priority order
+_CLASS_PATTERNS = (
+    ('class', 'class', r'(?:export\s+)?(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([^{]+))?'),
+    ('interface', 'interface', r'(?:export\s+)?interface\s+(\w+)(?:\s+extends\s+([^{]+))?'),
+    ('type', 'type', r'(?:export\s+)?type\s+(\w+)\s*=\s*([^;]+)'),
+)
+
+
+def _line_regex(gate: str, patterns: Tuple[Tuple[str, Optional[str], str], ...]) -> re.Pattern[str]:
+    """
+    Build a multi-line regex matching the first of *patterns* found on each code line.
+
+    The lazy prefix in front of each named group makes the alternation try the
+    patterns in order, like searching each in turn. Lookaheads skip lines
+    lacking the *gate* literal every pattern needs, or a pattern's own literals,
+    before the engine scans the line. The outer group that matched is
+    ``lastgroup``; its captures follow ``lastindex``.
+    """
+    alternatives = '|'.join(
+        (f'(?=[^\\n]*(?:{literals}))' if literals else '')
+        + f'[^\\n]*?(?P<{name}>{single_line(p)})'
+        for name, literals, p in patterns
+    )
+    return re.compile(rf'^{CODE_LINE}(?=[^\n]*(?:{gate}))(?:{alternatives})', re.MULTILINE)
+
+
+def _group_counts(regex: re.Pattern[str], patterns: Tuple[Tuple[str, Optional[str], str], ...]) -> Dict[int, int]:
+    """Map the index of each pattern's outer group in *regex* (``lastindex``) to its capture count."""
+    return {regex.groupindex[name]: re.compile(p).groups for name, _, p in patterns}
+
+
+_FUNCTION_RE = _line_regex(r'\(', _FUNCTION_PATTERNS)
+_CLASS_RE = _line_regex('class|interface|type', _CLASS_PATTERNS)
+_FUNCTION_GROUPS = _group_counts(_FUNCTION_RE, _FUNCTION_PATTERNS)
+_CLASS_GROUPS = _group_counts(_CLASS_RE, _CLASS_PATTERNS)
+
+
+# tree-sitter node types
+_TS_FUNCTION_NODES = frozenset({
+    'function_declaration', 'generator_function_declaration', 'method_definition',
+    'function_signature', 'method_signature', 'abstract_method_signature',
+})
+_TS_FUNCTION_VALUES = frozenset({'arrow_function', 'function', 'function_expression', 'generator_function'})
+_TS_CLASS_NODES = frozenset({'class_declaration', 'abstract_class_declaration', 'class'})
+
+
+def _node_child(node: Any, *types: str) -> Optional[Any]:
+    return next((child for child in node.named_children if child.type in types), None)
+
+
+def _without_keyword(node: Optional[Any]) -> str:
+    """Text of a clause such as ``extends Foo`` without its leading keyword."""
+    if node is None:
+        return ""
+    parts = node_text(node).split(None, 1)
+    return parts[1].strip() if len(parts) > 1 else ""
+
+
+def _node_type(node: Optional[Any]) -> Optional[str]:
+    """Text of a ``: type`` annotation without the colon."""
+    return node_text(node).lstrip(':').strip() if node is not None else None
+
+
+def _node_params(node: Any) -> str:
+    """Parameters of a function node as ``name: type``, without default values."""
+    params = node.child_by_field_name('parameters')
+    if params is None:  # single unparenthesised arrow parameter
+        param = node.child_by_field_name('parameter')
+        return node_text(param) if param is not None else ""
+    cleaned_params = []
+    for param in params.named_children:
+        if param.type == 'comment':
+            continue
+        pattern = param.child_by_field_name('pattern')
+        name = node_text(pattern if pattern is not None else param)
+        if param.type == 'optional_parameter':
+            name += '?'
+        type_ann = _node_type(param.child_by_field_name('type'))
+        cleaned_params.append(f"{name}: {type_ann}" if type_ann else name)
+    return ", ".join(cleaned_params)
+
+
 class TypeScriptParser:
     """Parser for TypeScript files using regex-based parsing."""
     
-    def parse_file(self, file_path: Path) -> Tuple[List[str], List[str]]:
+    def __init__(self) -> None:
+        self._ts_tree_parser = load_tree_sitter('typescript')
+        # JavaScript and JSX files come through here too; the tsx grammar reads both
+        self._tsx_tree_parser = load_tree_sitter('tsx')
+    
+    def parse_file(self, file_path: Path, content: Optional[str] = None) -> Tuple[List[str], List[str]]:
         """
         Parse a TypeScript file and return function signatures and class definitions.
+        The file is read unless its text is passed as ``content``.
         
         Returns:
             Tuple of (function_lines, class_lines)
         """
         try:
-            content = file_path.read_text(encoding='utf-8', errors='ignore')
+            if content is None:
+                content = read_source(file_path)
+            tree_parser = self._ts_tree_parser if file_path.suffix == '.ts' else self._tsx_tree_parser
+            if tree_parser is not None:
+                return self._parse_with_tree_sitter(tree_parser, content, file_path)
             return self._parse_with_regex(content, file_path)
         except Exception:
             return [], []
     
+    def _parse_with_tree_sitter(self, tree_parser: Any, content: str, file_path: Path) -> Tuple[List[str], List[str]]:
+        """Syntax-tree based parsing for TypeScript."""
+        func_lines: List[str] = []
+        cls_lines: List[str] = []
+        rel_path = file_path.name
+        
+        tree = tree_parser.parse(content.encode('utf-8', errors='ignore'))
+        stack = [tree.root_node]
+        while stack:  # pre-order walk, so definitions come out in source order
+            node = stack.pop()
+            stack.extend(reversed(node.named_children))
+            kind = node.type
+            i = node.start_point[0] + 1
+            
+            # Check for functions
+            if kind == 'variable_declarator':  # const foo = (params) => ...
+                value = node.child_by_field_name('value')
+                func = value if value is not None and value.type in _TS_FUNCTION_VALUES else None
+            else:
+                func = node if kind in _TS_FUNCTION_NODES else None
+            if func is not None:
+                return_type = _node_type(func.child_by_field_name('return_type')) or "any"
+                func_lines.append(f"{rel_path}:{i}: {node_name(node)}({_node_params(func)}) -> {return_type}")
+                continue
+            
+            # Check for classes/interfaces
+            if kind in _TS_CLASS_NODES:
+                heritage = _node_child(node, 'class_heritage')
+                extends = _without_keyword(heritage and _node_child(heritage, 'extends_clause'))
+                implements = _without_keyword(heritage and _node_child(heritage, 'implements_clause'))
+            elif kind == 'interface_declaration':
+                extends = _without_keyword(_node_child(node, 'extends_type_clause', 'extends_clause'))
+                implements = ""
+            elif kind == 'type_alias_declaration':
+                extends = node_text(node.child_by_field_name('value'))
+                implements = ""
+            else:
+                continue
+            
+            class_def = f"class {node_name(node)}"
+            if extends:
+                class_def += f" extends {extends}"
+            if implements:
+                class_def += f" implements {implements}"
+            
+            cls_lines.append(f"{rel_path}:{i}: {class_def}")
+        
+        return func_lines, cls_lines
+    
     def _parse_with_regex(self, content: str, file_path: Path) -> Tuple[List[str], List[str]]:
         """Fallback regex-based parsing for TypeScript."""
         func_lines: List[str] = []
         cls_lines: List[str] = []
         rel_path = file_path.name
         
-        # Function patterns
-        function_patterns = [
-            # Regular functions
-            r'(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)(?:\s*:\s*([^{]+))?',
-            # Arrow functions assigned to variables
-            r'(?:export\s+)?(?:const|let|var)\s+(\w+)\s*[:=]\s*(?:async\s+)?\(([^)]*)\)(?:\s*=>\s*[^{]+)?',
-            # Method definitions in classes/interfaces
-            r'(\w+)\s*\(([^)]*)\)(?:\s*:\s*([^{]+))?',
-        ]
-        
-        # Class patterns
-        class_patterns = [
-            r'(?:export\s+)?(?:abstract\s+)?class\s+(\w+)(?:\s+extends\s+(\w+))?(?:\s+implements\s+([^{]+))?',
-            r'(?:export\s+)?interface\s+(\w+)(?:\s+extends\s+([^{]+))?',
-            r'(?:export\s+)?type\s+(\w+)\s*=\s*([^;]+)',
-        ]
+        # Check for functions
+        i, pos = 1, 0
+        for match in _FUNCTION_RE.finditer(content):
+            i += content.count('\n', pos, match.start())
+            pos = match.start()
+            match = stripped_match(_FUNCTION_RE, content, match)
+            if match is None:
+                continue
+            base = match.lastindex
+            func_name = match.group(base + 1)
+            params = match.group(base + 2).strip()
+            return_type = match.group(base + 3) if _FUNCTION_GROUPS[base] > 2 else None
+            return_type = return_type.strip() if return_type else "any"
+            
+            # Clean up parameters
+            if params:
+                params = self._clean_typescript_params(params)
+            
+            func_lines.append(f"{rel_path}:{i}: {func_name}({params}) -> {return_type}")
         
-        lines = content.split('\n')
-        for i, line in enumerate(lines, 1):
-            line = line.strip()
+        # Check for classes/interfaces
+        i, pos = 1, 0
+        for match in _CLASS_RE.finditer(content):
+            i += content.count('\n', pos, match.start())
+            pos = match.start()
+            match = stripped_match(_CLASS_RE, content, match)
+            if match is None:
+                continue
+            base = match.lastindex
+            class_name = match.group(base + 1)
+            extends = match.group(base + 2) or ""
+            implements = (match.group(base + 3) if _CLASS_GROUPS[base] > 2 else None) or ""
             
-            # Check for functions
-            for pattern in function_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    func_name = match.group(1)
-                    params = match.group(2).strip()
-                    return_type = match.group(3).strip() if len(match.groups()) > 2 and match.group(3) else "any"
-                    
-                    # Clean up parameters
-                    if params:
-                        params = self._clean_typescript_params(params)
-                    
-                    func_lines.append(f"{rel_path}:{i}: {func_name}({params}) -> {return_type}")
-                    break
+            class_def = f"class {class_name}"
+            if extends:
+                class_def += f" extends {extends}"
+            if implements:
+                class_def += f" implements {implements}"
             
-            # Check for classes/interfaces
-            for pattern in class_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    class_name = match.group(1)
-                    extends = match.group(2) if len(match.groups()) > 1 and match.group(2) else ""
-                    implements = match.group(3) if len(match.groups()) > 2 and match.group(3) else ""
-                    
-                    class_def = f"class {class_name}"
-                    if extends:
-                        class_def += f" extends {extends}"
-                    if implements:
-                        class_def += f" implements {implements}"
-                    
-                    cls_lines.append(f"{rel_path}:{i}: {class_def}")
-                    break
+            cls_lines.append(f"{rel_path}:{i}: {class_def}")
         
         return func_lines, cls_lines
     
@@ -92,40 +242,20 @@ class TypeScriptParser:
         if not params:
             return ""
         
-        # Split by comma, but be careful about nested parentheses
-        param_list = []
-        current_param = ""
-        paren_count = 0
-        
-        for char in params:
-            if char == '(':
-                paren_count += 1
-            elif char == ')':
-                paren_count -= 1
-            elif char == ',' and paren_count == 0:
-                param_list.append(current_param.strip())
-                current_param = ""
-                continue
-            current_param += char
-        
-        if current_param.strip():
-            param_list.append(current_param.strip())
+        # Split by comma; ``params`` comes from a ``[^)]*`` capture, so a nested
+        # '(' is never closed and only the commas before the first '(' count
+        head, paren, tail = params.partition('(')
+        param_list = head.split(',')
+        param_list[-1] += paren + tail
+        param_list = [param.strip() for param in param_list]
+        if not param_list[-1]:
+            param_list.pop()
         
-        # Clean up each parameter
+        # Clean up each parameter: drop default values, tidy type annotations
         cleaned_params = []
         for param in param_list:
-            # Remove default values
-            if '=' in param:
-                param = param.split('=')[0].strip()
-            
-            # Clean up type annotations
-            if ':' in param:
-                name, type_ann = param.split(':', 1)
-                name = name.strip()
-                type_ann = type_ann.strip()
-                cleaned_params.append(f"{name}: {type_ann}")
-            else:
-                cleaned_params.append(param.strip())
+            name, colon, type_ann = param.partition('=')[0].partition(':')
+            cleaned_params.append(f"{name.strip()}: {type_ann.strip()}" if colon else name.strip())
         
         return ", ".join(cleaned_params)
     
@@ -0,0 +1,340 @@
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from context_builder import cli
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    root = tmp_path / "project"
+    root.mkdir()
+    (root / "mod.py").write_text("def foo(a: int) -> str:\n    pass\n")
+    return root
+
+
+def _parse_counting(monkeypatch: pytest.MonkeyPatch) -> list:
+    parsed: list = []
+    parse_files = cli.parse_files
+
+    def counting(files, project_root):
+        parsed.extend(f.name for f in files)
+        return parse_files(files, project_root)
+
+    monkeypatch.setattr(cli, "parse_files", counting)
+    return parsed
+
+
+def test_parse_cache_hit(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    files = [project / "mod.py"]
+    cache = cli.load_parse_cache()
+    fresh: cli.CacheEntries = {}
+    first = cli.parse_files_cached(files, project, cli.root_entries(cache, project), fresh)
+    cli.save_parse_cache(cache, project, fresh)
+
+    parsed = _parse_counting(monkeypatch)
+    entries = cli.root_entries(cli.load_parse_cache(), project)
+    again = cli.parse_files_cached(files, project, entries, {})
+
+    assert parsed == []
+    assert again == first == [(["mod.py:1: foo(a: int) -> str"], [])]
+
+
+@pytest.mark.parametrize(
+    "roots",
+    [
+        None,
+        [],
+        {"ROOT": []},
+        {"ROOT": {"mod.py": "junk"}},
+        {"ROOT": {"mod.py": [0, 0]}},
+        {"ROOT": {"mod.py": ["MTIME", "SIZE", "junk", []]}},
+        {"ROOT": {"mod.py": ["MTIME", "SIZE", [1], []]}},
+    ],
+)
+def test_malformed_parse_cache(project: Path, roots: object) -> None:
+    st = (project / "mod.py").stat()
+    data = {"stamp": cli._parse_cache_stamp()}
+    if roots is not None:
+        text = (
+            json.dumps(roots)
+            .replace("ROOT", str(project))
+            .replace('"MTIME"', str(st.st_mtime_ns))
+            .replace('"SIZE"', str(st.st_size))
+        )
+        data["roots"] = json.loads(text)
+    cache_file = cli._parse_cache_file()
+    cache_file.parent.mkdir(parents=True)
+    cache_file.write_text(json.dumps(data), encoding="utf-8")
+
+    cache = cli.load_parse_cache()
+    fresh: cli.CacheEntries = {}
+    entries = cli.root_entries(cache, project)
+    result = cli.parse_files_cached([project / "mod.py"], project, entries, fresh)
+    cli.save_parse_cache(cache, project, fresh)
+
+    assert result == [(["mod.py:1: foo(a: int) -> str"], [])]
+    assert cli.root_entries(cli.load_parse_cache(), project) == fresh
+
+
+def test_parse_cache_invalidation(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = project / "mod.py"
+    fresh: cli.CacheEntries = {}
+    cli.parse_files_cached([source], project, {}, fresh)
+    parsed = _parse_counting(monkeypatch)
+
+    # same size, new mtime
+    st = source.stat()
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    cli.parse_files_cached([source], project, fresh, {})
+    assert parsed == ["mod.py"]
+
+    # new size, same mtime
+    st = source.stat()
+    source.write_text("def bar() -> None:\n    pass\n")
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns))
+    result = cli.parse_files_cached([source], project, fresh, {})
+    assert parsed == ["mod.py", "mod.py"]
+    assert result == [(["mod.py:1: bar() -> None"], [])]
+
+
+def test_no_cache_skips_cache_file(
+    project: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    out = tmp_path / "report.txt"
+
+    def run(*flags: str) -> str:
+        monkeypatch.setattr(sys, "argv", ["context_builder", str(project), "--out", str(out), *flags])
+        cli.main()
+        return out.read_text(encoding="utf-8")
+
+    run()
+    cache_file = cli._parse_cache_file()
+    data = json.loads(cache_file.read_text(encoding="utf-8"))
+    data["roots"][str(project.resolve())]["mod.py"][2] = ["mod.py:1: from_cache()"]
+    cache_file.write_text(json.dumps(data), encoding="utf-8")
+    cached = cache_file.read_bytes()
+
+    report = run("--no-cache")
+    assert "foo(a: int) -> str" in report
+    assert "from_cache()" not in report
+    assert cache_file.read_bytes() == cached
+
+    assert "from_cache()" in run()
+
+
+def _mixed_project(root: Path) -> List[Path]:
+    for i in range(cli.PARALLEL_MIN_FILES):
+        (root / f"m{i}.py").write_text(
+            f"class C{i}:\n    def f{i}(self, x: int) -> None:\n        pass\n"
+        )
+        (root / f"t{i}.ts").write_text(f"export function g{i}(a: string): number {{}}\n")
+    return cli.list_py_files(root, None) + cli.list_ts_js_files(root, None)
+
+
+def test_parse_files_in_pool(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    pools: list = []
+
+    class RecordingPool(ProcessPoolExecutor):
+        def __init__(self) -> None:
+            super().__init__()
+            pools.append(self)
+
+    monkeypatch.setattr(cli, "ProcessPoolExecutor", RecordingPool)
+    files = _mixed_project(project)
+
+    result = cli.parse_files(files, project)
+
+    assert len(pools) == 1
+    assert result == [cli._parse_file((f, project)) for f in files]
+    assert result[0] == (["m0.py:2: f0(self, x: int) -> None"], ["m0.py:1: class C0"])
+    assert result[-1] == (["t7.ts:1: g7(a: string) -> number"], [])
+
+
+def test_parse_files_worker_error(project: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    files = _mixed_project(project)
+    (project / "dangling.py").symlink_to(project / "missing.py")
+    with pytest.raises(FileNotFoundError):
+        cli.parse_files(files + [project / "dangling.py"], project)
+
+    # an error from the workers is raised, not answered with a serial re-run
+    class FailingPool:
+        def __enter__(self) -> "FailingPool":
+            return self
+
+        def __exit__(self, *exc: object) -> None:
+            pass
+
+        def map(self, fn, jobs, chunksize=1):
+            raise PermissionError("worker failed")
+
+    monkeypatch.setattr(cli, "ProcessPoolExecutor", FailingPool)
+    with pytest.raises(PermissionError):
+        cli.parse_files(files, project)
+
+
+MIXED_PROJECT = {
+    ".gitignore": "# generated output\nbuild_out/\n*.log\nsecret.py\n!keep.py\n",
+    "requirements.txt": "requests>=2  # http\nclick\n",
+    "package.json": '{"dependencies": {"react": "^18"}, "devDependencies": {"jest": "1"}}',
+    "Zeta.py": "def zeta() -> None:\n    pass\n",
+    "alpha.py": "import os\n\n\nasync def alpha(path: os.PathLike, *args, **kwargs):\n    pass\n",
+    "secret.py": "def hidden():\n    pass\n",
+    "notes.log": "not source\n",
+    "app/__init__.py": "",
+    "app/models.py": (
+        "from typing import List\n"
+        "\n"
+        "\n"
+        "class Base:\n"
+        "    pass\n"
+        "\n"
+        "\n"
+        "class User(Base):\n"
+        "    kind: str = 'user'\n"
+        "    count = 0\n"
+        "\n"
+        "    def __init__(self, name: str, tags: List[str]) -> None:\n"
+        "        self.name: str = name\n"
+        "        self.tags = tags\n"
+        "        if tags:\n"
+        "            self.first = tags[0]  # type: str\n"
+        "\n"
+        "    @property\n"
+        "    def label(self) -> str:\n"
+        "        return self.name\n"
+        "\n"
+        "    def rename(self, name: str) -> 'User':\n"
+        "        def inner(x):\n"
+        "            return x\n"
+        "        return User(inner(name), self.tags)\n"
+    ),
+    "build_out/gen.py": "def generated():\n    pass\n",
+    "venv/lib/site.py": "def vendored():\n    pass\n",
+    "web/node_modules/lib/index.js": "function vendored() {}\n",
+    "web/src/api.ts": (
+        "export interface User extends Base {\n"
+        "  name: string;\n"
+        "}\n"
+        "export type Id = string | number;\n"
+        "export class ApiClient extends Base implements Client {\n"
+        "  constructor(private apiUrl: string, retries?: number) {}\n"
+        "  async get(path: string = '/'): Promise<User> {}\n"
+        "}\n"
+        "export const fetchUser = async (id: Id) => {};\n"
+    ),
+    "web/src/index.js": (
+        "import React from 'react';\n"
+        "function render(root, props = {}) {\n"
+        "  return null;\n"
+        "}\n"
+        "const add = (a, b) => a + b;\n"
+        "class App extends React.Component {\n"
+        "  render() {\n"
+        "  }\n"
+        "}\n"
+        "export default App;\n"
+    ),
+}
+
+
+def _write_project(root: Path) -> Path:
+    for rel, text in MIXED_PROJECT.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    return root
+
+
+def _relative(root: Path, files: List[Path]) -> List[str]:
+    return [f.relative_to(root).as_posix() for f in files]
+
+
+def test_list_files_prunes_ignored_dirs(tmp_path: Path) -> None:
+    root = _write_project(tmp_path / "mixed")
+    ignore_re = cli.load_gitignore(root)
+    assert _relative(root, cli.list_py_files(root, ignore_re)) == [
+        "Zeta.py",
+        "alpha.py",
+        "app/__init__.py",
+        "app/models.py",
+    ]
+    assert _relative(root, cli.list_ts_js_files(root, ignore_re)) == ["web/src/api.ts", "web/src/index.js"]
+
+
+def test_list_files_skips_always(tmp_path: Path) -> None:
+    root = _write_project(tmp_path / "mixed")
+    for name in sorted(cli.SKIP_ALWAYS):
+        (root / "app" / name).mkdir(exist_ok=True)
+        (root / "app" / name / "skipped.py").write_text("x = 1\n", encoding="utf-8")
+    py_files = _relative(root, cli.list_py_files(root, None))
+    assert "build_out/gen.py" in py_files and "secret.py" in py_files
+    assert not any("skipped" in f or f.startswith("venv/") for f in py_files)
+    assert _relative(root, cli.list_ts_js_files(root, None)) == ["web/src/api.ts", "web/src/index.js"]
+
+
+@pytest.mark.parametrize(
+    "rel, ignored",
+    [
+        ("build_out", True),
+        ("build_out/gen.py", True),
+        ("app/build_out", False),
+        ("notes.log", True),
+        ("app/debug.log", True),
+        ("secret.py", True),
+        ("keep.py", False),
+        ("app/models.py", False),
+    ],
+)
+def test_gitignore_patterns(tmp_path: Path, rel: str, ignored: bool) -> None:
+    root = _write_project(tmp_path / "mixed")
+    assert cli.is_gitignored(rel, cli.load_gitignore(root)) is ignored
+
+
+@pytest.mark.parametrize("text", ["", "# only a comment\n\n", "!keep.py\n", "# comment\n!keep.py\n   \n"])
+def test_gitignore_without_patterns(tmp_path: Path, text: str) -> None:
+    (tmp_path / ".gitignore").write_text(text, encoding="utf-8")
+    ignore_re = cli.load_gitignore(tmp_path)
+    assert ignore_re is None
+    assert not cli.is_gitignored("keep.py", ignore_re)
+    assert not cli.is_gitignored("src/mod.py", ignore_re)
+
+
+def test_ascii_tree(tmp_path: Path) -> None:
+    root = _write_project(tmp_path / "mixed")
+    assert cli.ascii_tree(root, cli.load_gitignore(root)).splitlines() == [
+        "mixed",
+        "├── .gitignore",
+        "├── Zeta.py",
+        "├── alpha.py",
+        "├── app",
+        "│   ├── __init__.py",
+        "│   └── models.py",
+        "├── package.json",
+        "├── requirements.txt",
+        "└── web",
+        "    └── src",
+        "        ├── api.ts",
+        "        └── index.js",
+    ]
+
+
+def test_report_matches_baseline(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # generated by the original Path.rglob/fnmatch implementation, which only
+    # had the regex parsers; the project is too small for the process pool
+    expected = (Path(__file__).parent / "data" / "mixed_project_report.txt").read_bytes()
+    root = _write_project(tmp_path / "mixed")
+    out = tmp_path / "context.txt"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setattr(cli.ts_parser, "_ts_tree_parser", None)
+    monkeypatch.setattr(cli.ts_parser, "_tsx_tree_parser", None)
+    for flags in ([], ["--no-cache"], []):  # cold cache, no cache, warm cache
+        monkeypatch.setattr(sys, "argv", ["context_builder", str(root), "--out", str(out), "--include-source", *flags])
+        cli.main()
+        assert out.read_bytes() == expected
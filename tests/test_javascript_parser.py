@@ -1,6 +1,10 @@
 import textwrap
 from pathlib import Path
-from context_builder.javascript_parser import parse_file
+
+import pytest
+
+from context_builder.javascript_parser import JavaScriptParser, parse_file
+from context_builder.parser_utils import read_source
 
 
 def test_extract_functions(tmp_path: Path) -> None:
@@ -49,3 +53,106 @@ def test_extract_classes(tmp_path: Path) -> None:
         "classes.js:2: class Bar",
         "classes.js:3: class Baz",
     ]
+
+
+def test_skip_comment_and_brace_lines(tmp_path: Path) -> None:
+    code = textwrap.dedent(
+        """
+        // function commented(a) {}
+        /* class Hidden {} */
+         * helper(x) {
+        } catch (err) {
+        function real(a) {}
+        """
+    ).strip()
+    file_path = tmp_path / "comments.js"
+    file_path.write_text(code)
+
+    funcs, classes = parse_file(file_path)
+
+    assert funcs == ["comments.js:5: real(a)"]
+    assert classes == []
+
+
+def test_export_default_at_line_start(tmp_path: Path) -> None:
+    # a regex-fallback restriction; tree-sitter also finds the second default
+    code = textwrap.dedent(
+        """
+          export default function (a) {}
+        run(); export default (b) => b;
+        """
+    ).strip("\n")
+    file_path = tmp_path / "defaults.js"
+
+    funcs, classes = JavaScriptParser()._parse_with_regex(code, file_path)
+
+    assert funcs == ["defaults.js:1: <anonymous>(a)"]
+    assert classes == []
+
+
+def test_crlf_line_endings(tmp_path: Path) -> None:
+    code = "function a(x) {}\r\n// b\r\nclass C extends D {\r\n  m(y) {\r\n  }\r\n}\r\n"
+    file_path = tmp_path / "crlf.js"
+    file_path.write_bytes(code.encode())
+
+    assert read_source(file_path) == code.replace("\r\n", "\n")
+    expected = (["crlf.js:1: a(x)", "crlf.js:4: m(y)"], ["crlf.js:3: class C"])
+    assert parse_file(file_path) == expected
+    assert parse_file(file_path, content=code) == expected
+    assert JavaScriptParser()._parse_with_regex(code, file_path) == expected
+
+
+def test_hyperscan_matches_re(tmp_path: Path) -> None:
+    pytest.importorskip("hyperscan")
+    code = textwrap.dedent(
+        """
+        export default function main(argv) {
+        export async function load(url, opts = {}) {}
+        const add = (a, b = 1) => a + b;
+        export default (q) => q;
+        class Foo extends Bar {
+          method(x, y) {
+          getValue() { return this.value; }
+        }
+        // function hidden() {}
+        export default Foo;
+        """
+    ).strip()
+    file_path = tmp_path / "sample.js"
+
+    parser = JavaScriptParser()
+    assert parser._hs_db is not None
+    with_hyperscan = parser._parse_with_regex(code, file_path)
+    parser._hs_db = None
+
+    assert with_hyperscan == parser._parse_with_regex(code, file_path)
+    assert with_hyperscan[0] != []
+
+
+def test_tree_sitter(tmp_path: Path) -> None:
+    pytest.importorskip("tree_sitter_languages")
+    code = textwrap.dedent(
+        """
+        export function foo(a, b = 1) {}
+        const bar = (x, y) => x + y;
+        export default function (z) {}
+        class Foo extends Bar {
+          method(q) {}
+        }
+        export default Foo;
+        """
+    ).strip()
+    file_path = tmp_path / "sample.js"
+
+    parser = JavaScriptParser()
+    assert parser._tree_parser is not None
+    funcs, classes = parser._parse_with_tree_sitter(code, file_path)
+
+    assert funcs == [
+        "sample.js:1: foo(a, b)",
+        "sample.js:2: bar(x, y)",
+        "sample.js:3: <anonymous>(z)",
+        "sample.js:5: method(q)",
+        "sample.js:7: export default Foo",
+    ]
+    assert classes == ["sample.js:4: class Foo"]
@@ -0,0 +1,128 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from context_builder.typescript_parser import TypeScriptParser
+
+
+def test_extract_functions_and_classes() -> None:
+    code = textwrap.dedent(
+        """
+        export interface User extends Base {
+          name: string;
+        }
+        export interface Admin extends User, Auditable {}
+        export type Id = string | number;
+        export abstract class ApiClient extends Base implements Client, Closeable {
+          constructor(protected apiUrl: string, retries?: number) {}
+          async get(path: string = "/"): Promise<User> {}
+          private static reset() {}
+        }
+        class Plain {}
+        export function parse(text: string): Id {}
+        function helper(a, b = 2) {}
+        export const fetchUser = async (id: Id): Promise<User> => {};
+        """
+    ).strip()
+
+    funcs, classes = TypeScriptParser()._parse_with_regex(code, Path("api.ts"))
+
+    assert funcs == [
+        "api.ts:7: constructor(protected apiUrl: string, retries?: number) -> any",
+        "api.ts:8: get(path: string) -> Promise<User>",
+        "api.ts:9: reset() -> any",
+        "api.ts:12: parse(text: string) -> Id",
+        "api.ts:13: helper(a, b) -> any",
+        "api.ts:14: fetchUser(id: Id) -> any",
+    ]
+    assert classes == [
+        "api.ts:1: class User extends Base ",
+        "api.ts:4: class Admin extends User, Auditable ",
+        "api.ts:5: class Id extends string | number",
+        "api.ts:6: class ApiClient extends Base implements Client, Closeable ",
+        "api.ts:11: class Plain",
+    ]
+
+
+def test_trailing_whitespace() -> None:
+    # the patterns were written for stripped lines
+    code = "export class Wide extends Base implements Client   \n{\n}\ninterface Tall extends Base\t\n{}\nfunction spaced(a: string)  \n{}\n"
+
+    funcs, classes = TypeScriptParser()._parse_with_regex(code, Path("api.ts"))
+
+    assert funcs == ["api.ts:6: spaced(a: string) -> any"]
+    assert classes == [
+        "api.ts:1: class Wide extends Base implements Client",
+        "api.ts:4: class Tall extends Base",
+    ]
+
+
+def test_skip_comment_and_brace_lines() -> None:
+    code = textwrap.dedent(
+        """
+        // function commented(a: string): void {}
+        /* class Hidden {} */
+         * helper(x: number) {
+        } catch (err) {
+        ;(function iife() {})
+
+          interface Shown {}
+        function real(a: string): void {}
+        """
+    ).strip()
+
+    funcs, classes = TypeScriptParser()._parse_with_regex(code, Path("comments.ts"))
+
+    assert funcs == ["comments.ts:8: real(a: string) -> void"]
+    assert classes == ["comments.ts:7: class Shown"]
+
+
+def test_crlf_line_endings(tmp_path: Path) -> None:
+    code = "function a(x): void {}\r\ninterface I extends J\r\n{}\r\nclass B extends C {\r\n  m(y) {\r\n  }\r\n}\r\n"
+    file_path = tmp_path / "crlf.ts"
+    file_path.write_bytes(code.encode())
+
+    parser = TypeScriptParser()
+    expected = (
+        ["crlf.ts:1: a(x) -> void", "crlf.ts:5: m(y) -> any"],
+        ["crlf.ts:2: class I extends J", "crlf.ts:4: class B extends C"],
+    )
+    assert parser.parse_file(file_path) == expected
+    assert parser.parse_file(file_path, content=code) == expected
+    assert parser._parse_with_regex(code, file_path) == expected
+
+
+def test_tree_sitter(tmp_path: Path) -> None:
+    pytest.importorskip("tree_sitter_languages")
+    code = textwrap.dedent(
+        """
+        export interface User extends Base {
+          name: string;
+        }
+        export type Id = string | number;
+        export class ApiClient extends Base implements Client {
+          constructor(protected apiUrl: string, retries?: number) {}
+          async get(path: string = "/"): Promise<User> {}
+        }
+        export const fetchUser = async (id: Id): Promise<User> => {};
+        function helper(a, b = 2) {}
+        """
+    ).strip()
+    file_path = tmp_path / "api.ts"
+
+    parser = TypeScriptParser()
+    assert parser._ts_tree_parser is not None
+    funcs, classes = parser._parse_with_tree_sitter(parser._ts_tree_parser, code, file_path)
+
+    assert funcs == [
+        "api.ts:6: constructor(apiUrl: string, retries?: number) -> any",
+        "api.ts:7: get(path: string) -> Promise<User>",
+        "api.ts:9: fetchUser(id: Id) -> Promise<User>",
+        "api.ts:10: helper(a, b) -> any",
+    ]
+    assert classes == [
+        "api.ts:1: class User extends Base",
+        "api.ts:4: class Id extends string | number",
+        "api.ts:5: class ApiClient extends Base implements Client",
+    ]